@@ -174,6 +174,10 @@ class BeautifulSoup(Tag):
 
         self.builder = builder
         self.is_xml = builder.is_xml
+        # Seed the tree-type cache on the root so it propagates to
+        # every element as the tree is built, instead of being
+        # rediscovered by walking parent pointers at serialization time.
+        self._is_xml_cached = builder.is_xml
         self.builder.soup = self
 
         self.parse_only = parse_only
@@ -240,7 +244,11 @@ class BeautifulSoup(Tag):
         d = dict(self.__dict__)
         if 'builder' in d and not self.builder.picklable:
             del d['builder']
-        return d
+        # Tag keeps its core state in __slots__; return it alongside
+        # the dict so the default __setstate__ restores both.
+        slots = dict((name, getattr(self, name))
+                     for name in Tag.__slots__ if name != '__dict__')
+        return (d, slots)
 
     def _feed(self):
         # Convert the document to Unicode.
@@ -258,6 +266,7 @@ class BeautifulSoup(Tag):
         self.builder.reset()
         self.current_data = []
         self.currentTag = None
+        self._most_recent_element = None
         self.tagStack = []
         self.preserve_whitespace_tag_stack = []
         self.pushTag(self)
@@ -301,12 +310,9 @@ class BeautifulSoup(Tag):
             # nothing but ASCII spaces, replace it with a single space
             # or newline.
             if not self.preserve_whitespace_tag_stack:
-                strippable = True
-                for i in current_data:
-                    if i not in self.ASCII_SPACES:
-                        strippable = False
-                        break
-                if strippable:
+                # str.strip runs in C; the old per-character loop was
+                # a hot spot when parsing indented markup.
+                if not current_data.strip(self.ASCII_SPACES):
                     if '\n' in current_data:
                         current_data = '\n'
                     else:
@@ -337,10 +343,36 @@ class BeautifulSoup(Tag):
             if not previous_element:
                 previous_element = o.previous_element
 
+        contents = parent.contents
+        if (next_element is None and next_sibling is None
+            and previous_sibling is None and not parent.next_sibling):
+            # A plain streaming append, which is what every element
+            # of a normal parse is. Wire the links directly instead
+            # of going through the general-purpose setup() branches.
+            o.parent = parent
+            if parent._is_xml_cached is not None:
+                o._is_xml_cached = parent._is_xml_cached
+            o.previous_element = previous_element
+            if previous_element is not None:
+                previous_element.next_element = o
+            o.next_element = None
+            o.next_sibling = None
+            if contents:
+                previous_sibling = contents[-1]
+                o.previous_sibling = previous_sibling
+                previous_sibling.next_sibling = o
+            else:
+                o.previous_sibling = None
+            self._most_recent_element = o
+            contents.append(o)
+            o._index_hint = len(contents) - 1
+            return
+
         o.setup(parent, previous_element, next_element, previous_sibling, next_sibling)
 
         self._most_recent_element = o
-        parent.contents.append(o)
+        contents.append(o)
+        o._index_hint = len(contents) - 1
 
         if parent.next_sibling:
             # This node is being inserted into an element that has
@@ -1,7 +1,6 @@
 import sys
 
 from collections import defaultdict
-from collections import OrderedDict
 
 import itertools
 from sigil_bs4.element import (
@@ -95,7 +94,7 @@ class TreeBuilder(object):
 
     # A value for these tag/attribute combinations is a space- or
     # comma-separated list of CDATA, rather than a single CDATA.
-    cdata_list_attributes = OrderedDict()
+    cdata_list_attributes = {}
 
 
     def __init__(self):
@@ -188,7 +187,7 @@ class SAXTreeBuilder(TreeBuilder):
         pass
 
     def startElement(self, name, attrs):
-        attrs = OrderedDict((key[1], value) for key, value in list(attrs.items()))
+        attrs = dict((key[1], value) for key, value in list(attrs.items()))
         #print "Start %s, %r" % (name, attrs)
         self.soup.handle_starttag(name, attrs)
 
@@ -241,7 +240,7 @@ class HTMLTreeBuilder(TreeBuilder):
     # encounter one of these attributes, we will parse its value into
     # a list of values if possible. Upon output, the list will be
     # converted back into a string.
-    cdata_list_attributes = OrderedDict([
+    cdata_list_attributes = dict([
         ("*", ['class', 'accesskey', 'dropzone']),
         ("a", ['rel', 'rev']),
         ("link", ['rel', 'rev']),
@@ -1,5 +1,4 @@
 import sys
-from collections import OrderedDict
 
 __all__ = [
     'HTML5TreeBuilder',
@@ -136,7 +135,7 @@ class TreeBuilderForHtml5lib(treebuilder_base.TreeBuilder):
 class AttrList(object):
     def __init__(self, element):
         self.element = element
-        self.attrs = OrderedDict(self.element.attrs)
+        self.attrs = dict(self.element.attrs)
     def __iter__(self):
         return list(self.attrs.items()).__iter__()
     def __setitem__(self, name, value):
@@ -1,5 +1,4 @@
 import sys
-from collections import OrderedDict
 
 """Use the HTMLParser library to parse HTML files that aren't too bad."""
 
@@ -52,7 +51,7 @@ HTMLPARSER = 'html.parser'
 class BeautifulSoupHTMLParser(HTMLParser):
     def handle_starttag(self, name, attrs):
         # XXX namespace
-        attr_dict = OrderedDict()
+        attr_dict = {}
         for key, value in attrs:
             # Change None attribute values to the empty string
             # for consistency with the other tree builders.
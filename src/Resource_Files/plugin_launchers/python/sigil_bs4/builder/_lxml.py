@@ -1,5 +1,4 @@
 import sys
-from collections import OrderedDict
 
 __all__ = [
     'LXMLTreeBuilderForXML',
@@ -158,7 +157,7 @@ class LXMLTreeBuilderForXML(TreeBuilder):
 
     def start(self, name, attrs, nsmap={}):
         # Make sure attrs is a mutable dict--lxml may send an immutable dictproxy.
-        attrs = OrderedDict(attrs)
+        attrs = dict(attrs)
         nsprefix = None
 
         # ARRGGHH lxml 4.4.X has changes empty prefixes on namespaces to be the null string 
@@ -206,7 +205,7 @@ class LXMLTreeBuilderForXML(TreeBuilder):
         # Namespaces are in play. Find any attributes that came in
         # from lxml with namespaces attached to their names, and
         # turn then into NamespacedAttribute objects.
-        new_attrs = OrderedDict()
+        new_attrs = {}
         for attr, value in list(attrs.items()):
             namespace, attr = self._getNsTag(attr)
             if namespace is None:
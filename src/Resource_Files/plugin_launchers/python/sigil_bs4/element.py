@@ -3,44 +3,255 @@ try:
 except ImportError as e:
     from collections import Callable
 import sys
-from collections import OrderedDict
 
 from pdb import set_trace
+import functools
 import re
 import warnings
+from collections import deque
 from sigil_bs4.dammit import EntitySubstitution
 
 DEFAULT_OUTPUT_ENCODING = "utf-8"
 
 whitespace_re = re.compile("\s+")
 
-NON_BREAKING_INLINE_TAGS = ("a","abbr","acronym","b","bdo","big","br",
+@functools.lru_cache(maxsize=256)
+def _whitespace_split(s):
+    """Memoized whitespace_re.split(), as a tuple.
+
+    SoupStrainer._matches re-splits the same literal search strings
+    for every candidate; the distinct inputs are the handful of
+    multi-word values a caller searches for.
+    """
+    return tuple(whitespace_re.split(s))
+
+@functools.lru_cache(maxsize=256)
+def _indent(chars, level):
+    """Memoized indentation string for the pretty printers.
+
+    The serializers recompute 'chars * (level - 1)' for every node; the
+    distinct results only ever number O(depth), so cache them.
+    """
+    return chars * (level - 1)
+
+# Shared empty-attrs sentinel for the find_* family of methods. The
+# callers never mutate their 'attrs' argument (SoupStrainer copies it),
+# so one shared mapping avoids allocating a fresh default per method.
+_NO_ATTRS = {}
+
+NON_BREAKING_INLINE_TAGS = frozenset(("a","abbr","acronym","b","bdo","big","br",
     "button","cite","code","del","dfn","em","font","i","image","img",
     "input","ins","kbd","label","map","mark", "nobr","object","q",
     "ruby","rt","s","samp","select","small","span","strike","strong",
-    "sub","sup","textarea","tt","u","var","wbr","mbp:nu")
+    "sub","sup","textarea","tt","u","var","wbr","mbp:nu"))
 
-PRESERVE_WHITESPACE_TAGS = ("code","pre","textarea","script","style")
+PRESERVE_WHITESPACE_TAGS = frozenset(("code","pre","textarea","script","style"))
 
-VOID_TAGS = ("area","base","basefont","bgsound","br","col","command",
+VOID_TAGS = frozenset(("area","base","basefont","bgsound","br","col","command",
     "embed","event-source","frame","hr","img","input","keygen",
     "link","meta","param","source","spacer","track","wbr",
-    "mbp:pagebreak")
+    "mbp:pagebreak"))
 
-NO_ENTITY_SUB_TAGS = ("script", "style")
+NO_ENTITY_SUB_TAGS = frozenset(("script", "style"))
 
-SPECIAL_HANDLING_TAGS = ("html", "body")
+SPECIAL_HANDLING_TAGS = frozenset(("html", "body"))
 
-STRUCTURAL_TAGS = ("article","aside","blockquote","body","canvas",
+STRUCTURAL_TAGS = frozenset(("article","aside","blockquote","body","canvas",
     "colgroup","div","dl","figure","footer","head","header","hr","html",
-    "ol","section","table","tbody","tfoot","thead","td","th","tr","ul")
+    "ol","section","table","tbody","tfoot","thead","td","th","tr","ul"))
 
-OTHER_TEXTHOLDING_TAGS = ("address","caption","dd","div","dt","figcaption","h1","h2",
-    "h3","h4","h5","h6","legend","li","option","p","td","th","title")
+OTHER_TEXTHOLDING_TAGS = frozenset(("address","caption","dd","div","dt","figcaption","h1","h2",
+    "h3","h4","h5","h6","legend","li","option","p","td","th","title"))
 
-EBOOK_XML_PARENT_TAGS = ("package","metadata","manifest","spine","guide","ncx",
+EBOOK_XML_PARENT_TAGS = frozenset(("package","metadata","manifest","spine","guide","ncx",
                          "head","doctitle","docauthor","navmap", "navpoint",
-                          "navlabel", "pagelist", "pagetarget") 
+                          "navlabel", "pagelist", "pagetarget"))
+
+# Category flags for a tag name, packed into one int and memoized, so
+# the serializers can answer every category question about a tag with
+# a single dict probe instead of several set-membership tests.
+_FLAG_INLINE = 1
+_FLAG_VOID = 2
+_FLAG_PRESERVE_WHITESPACE = 4
+_FLAG_STRUCTURAL = 8
+_FLAG_TEXTHOLDING = 16
+_FLAG_SPECIAL_HANDLING = 32
+
+_TAG_FLAGS = {}
+
+# Node-kind codes for the serializer content loops. Walking the
+# isinstance() ladder (Comment / CData / NavigableString / Tag) per
+# child climbs several MROs for every text node; the ladder only needs
+# to run once per concrete class, after which a dict lookup on
+# c.__class__ answers it.
+_KIND_COMMENT = 1
+_KIND_CDATA = 2
+_KIND_STRING = 3
+_KIND_TAG = 4
+
+_NODE_KINDS = {}
+
+# Memoized CSS selector parsing. Selector strings in plugins are drawn
+# from a small fixed set, so cache both the whitespace tokenization of
+# whole selectors and the compiled form of each simple token. The
+# caches are cleared if they somehow grow past a sane bound.
+_SELECTOR_TOKEN_LISTS = {}
+_SELECTOR_STEPS = {}
+_ATTRIBUTE_CHECKERS = {}
+
+# Monotonic generation counter for select()'s match dedup; see the
+# comments in select(). Boxed in a list so nested calls share it.
+_SELECT_GEN = [0]
+
+# Returned by the nth-of-type counter when no later candidate from the
+# current generator can match; select() stops that generator. Raising
+# StopIteration for this is both expensive and, since PEP 479, unsafe
+# to let bubble through a generator frame.
+_STOP = object()
+
+# Dispatch kinds for SoupStrainer criteria. A strainer classifies each
+# of its criteria once at construction time so _matches() can branch on
+# a small integer instead of re-running an isinstance ladder for every
+# candidate element.
+_MK_TRUE = 0
+_MK_STR = 1
+_MK_CALLABLE = 2
+_MK_REGEX = 3
+_MK_ITER = 4
+_MK_OTHER = 5
+
+def _match_kind(match_against):
+    if match_against is True:
+        return _MK_TRUE
+    if isinstance(match_against, str):
+        return _MK_STR
+    if callable(match_against):
+        return _MK_CALLABLE
+    if hasattr(match_against, 'match'):
+        return _MK_REGEX
+    if hasattr(match_against, '__iter__'):
+        return _MK_ITER
+    return _MK_OTHER
+
+# Compiled once at import; select() consults these per token and the
+# class-level aliases on PageElement stay for backwards compatibility.
+_TAG_NAME_RE = re.compile('^[a-zA-Z0-9][-.a-zA-Z0-9:_]*$')
+_ATTRIBSELECT_RE = re.compile(
+    r'^(?P<tag>[a-zA-Z0-9][-.a-zA-Z0-9:_]*)?\[(?P<attribute>[\w-]+)(?P<operator>[=~\|\^\$\*]?)' +
+    r'=?"?(?P<value>[^\]"]*)"?\]$'
+    )
+_PSEUDO_RE = re.compile('([a-zA-Z\d-]+)\(([a-zA-Z\d]+)\)')
+_GROUP_COMMA_RE = re.compile(',[\s]*')
+
+def _tag_descendants(tag, name=None):
+    """Yield the Tag descendants of 'tag' in document order.
+
+    Unlike the .descendants property this never touches the
+    next_element pointer chain and never yields strings, so callers
+    that only want tags (the CSS selector machinery) skip roughly half
+    the nodes of a typical document. With 'name' given, non-matching
+    tags are still descended through but not yielded.
+    """
+    stack = deque(reversed(tag.contents))
+    pop = stack.pop
+    push = stack.extend
+    while stack:
+        node = pop()
+        # Almost every node is exactly Tag or exactly a string type,
+        # so the identity test settles it one way without isinstance's
+        # call overhead; the fallback keeps Tag subclasses working.
+        if node.__class__ is Tag or isinstance(node, Tag):
+            if name is None or node.name == name:
+                yield node
+            contents = node.contents
+            if contents:
+                push(reversed(contents))
+
+# Candidate generators for the CSS combinators. select() used to build
+# these as closures inside its token loop even though they capture
+# nothing token-specific.
+class _NthOfTypeCounter(object):
+    """The one stateful CSS checker: counts candidates until the
+    requested ordinal is reached, then tells select() to stop."""
+    __slots__ = ('count', 'destination')
+
+    def __init__(self, destination):
+        self.count = 0
+        self.destination = destination
+
+    def nth_child_of_type(self, tag):
+        self.count += 1
+        if self.count == self.destination:
+            return True
+        if self.count > self.destination:
+            # Tell select() to stop the generator that's sending
+            # us these things.
+            return _STOP
+        return False
+
+def _combinator_children(tag):
+    return tag.children
+
+def _combinator_next_siblings(tag):
+    return tag.next_siblings
+
+def _combinator_next_tag_sibling(tag):
+    sibling = tag.find_next_sibling(True)
+    if sibling is not None:
+        yield sibling
+
+def _node_kind(cls, _cache=_NODE_KINDS):
+    kind = _cache.get(cls)
+    if kind is None:
+        if issubclass(cls, Comment):
+            kind = _KIND_COMMENT
+        elif issubclass(cls, CData):
+            kind = _KIND_CDATA
+        elif issubclass(cls, NavigableString):
+            kind = _KIND_STRING
+        elif issubclass(cls, Tag):
+            kind = _KIND_TAG
+        else:
+            kind = 0
+        _cache[cls] = kind
+    return kind
+
+
+def _tag_flags(name, _cache=_TAG_FLAGS):
+    flags = _cache.get(name)
+    if flags is None:
+        flags = 0
+        if name in NON_BREAKING_INLINE_TAGS:
+            flags |= _FLAG_INLINE
+        if name in VOID_TAGS:
+            flags |= _FLAG_VOID
+        if name in PRESERVE_WHITESPACE_TAGS:
+            flags |= _FLAG_PRESERVE_WHITESPACE
+        if name in STRUCTURAL_TAGS:
+            flags |= _FLAG_STRUCTURAL
+        if name in OTHER_TEXTHOLDING_TAGS:
+            flags |= _FLAG_TEXTHOLDING
+        if name in SPECIAL_HANDLING_TAGS:
+            flags |= _FLAG_SPECIAL_HANDLING
+        _cache[name] = flags
+    return flags
+
+# A parsed document repeats the same handful of tag and attribute
+# names many thousands of times. Seeding the interpreter's intern
+# table with them (and interning tag names as Tags are built, see
+# Tag.__init__) lets the name comparisons done throughout searching
+# and serialization short-circuit on pointer identity.
+_COMMON_ATTRIBUTE_NAMES = ("class", "id", "href", "src", "style", "title",
+    "alt", "name", "content", "rel", "type", "lang", "dir", "xmlns")
+
+for _name in _COMMON_ATTRIBUTE_NAMES:
+    sys.intern(_name)
+for _tags in (NON_BREAKING_INLINE_TAGS, PRESERVE_WHITESPACE_TAGS, VOID_TAGS,
+              SPECIAL_HANDLING_TAGS, STRUCTURAL_TAGS, OTHER_TEXTHOLDING_TAGS,
+              EBOOK_XML_PARENT_TAGS):
+    for _name in _tags:
+        sys.intern(_name)
+del _name, _tags
 
 def _alias(attr):
     """Alias one attribute name to another for backward compatibility"""
@@ -101,6 +312,10 @@ class ContentMetaAttributeValue(AttributeValueWithCharsetSubstitution):
     CHARSET_RE = re.compile("((^|;)\s*charset=)([^;]*)", re.M)
 
     def __new__(cls, original_value):
+        if 'charset=' not in original_value:
+            # Cheap substring test dodges the regex for the vast
+            # majority of meta 'content' values.
+            return str.__new__(str, original_value)
         match = cls.CHARSET_RE.search(original_value)
         if match is None:
             # No substitution necessary.
@@ -108,12 +323,22 @@ class ContentMetaAttributeValue(AttributeValueWithCharsetSubstitution):
 
         obj = str.__new__(cls, original_value)
         obj.original_value = original_value
+        # Keep the slice points around: encode() reuses them instead
+        # of running the regex over the value again. Plain ints, not
+        # the match object itself, so the value stays picklable.
+        obj._charset_span = (match.end(1), match.end())
         return obj
 
     def encode(self, encoding):
-        def rewrite(match):
-            return match.group(1) + encoding
-        return self.CHARSET_RE.sub(rewrite, self.original_value)
+        charset_start, charset_end = self._charset_span
+        original = self.original_value
+        if self.CHARSET_RE.search(original, charset_end) is not None:
+            # More than one charset declaration (pathological); fall
+            # back to rewriting them all.
+            def rewrite(match):
+                return match.group(1) + encoding
+            return self.CHARSET_RE.sub(rewrite, original)
+        return original[:charset_start] + encoding + original[charset_end:]
 
 class HTMLAwareEntitySubstitution(EntitySubstitution):
 
@@ -154,6 +379,12 @@ class PageElement(object):
     """Contains the navigational information for some part of the page
     (either a tag or a piece of text)"""
 
+    # No instance attributes of its own: keeping the slot layout empty
+    # here lets Tag declare real slots below while NavigableString
+    # (whose str base can't be combined with a slotted layout) keeps
+    # using a plain instance dict.
+    __slots__ = ()
+
     # There are five possible values for the "formatter" argument passed in
     # to methods like encode() and prettify():
     #
@@ -186,13 +417,31 @@ class PageElement(object):
 
     def format_string(self, s, formatter='minimal'):
         """Format the given string using the given formatter."""
-        if not isinstance(formatter, Callable):
-            formatter = self._formatter_for_name(formatter)
+        # The serializers resolve the formatter name to a function up
+        # front, so by far the most common case here is an
+        # already-callable formatter: check for that first with the
+        # callable() builtin rather than an abc isinstance check.
         if formatter is None:
-            output = s
-        else:
-            output = formatter(s)
-        return output
+            return s
+        if not callable(formatter):
+            formatter = self._formatter_for_name(formatter)
+            if formatter is None:
+                return s
+        return formatter(s)
+
+    # Cached result of _is_xml, filled in the first time it's computed
+    # and propagated down from the parent as elements are linked into
+    # the tree. Serializers ask this question once per string, so
+    # walking to the root every time made encode()/prettify() O(depth)
+    # per string on deep trees.
+    _is_xml_cached = None
+
+    # Last known position of this element in its parent's .contents.
+    # Methods like extract(), insert_before() and replace_with() all
+    # need that position; without a hint each of them rescans the
+    # whole .contents list. The hint is validated (by identity)
+    # before use and falls back to a scan, so it's just a cache.
+    _index_hint = None
 
     @property
     def _is_xml(self):
@@ -200,50 +449,73 @@ class PageElement(object):
 
         This is used when mapping a formatter name ("minimal") to an
         appropriate function (one that performs entity-substitution on
-        the contents of <script> and <style> tags, or not). It's
-        inefficient, but it should be called very rarely.
+        the contents of <script> and <style> tags, or not).
         """
-        if self.parent is None:
-            # This is the top-level object. It should have .is_xml set
-            # from tree creation. If not, take a guess--BS is usually
-            # used on HTML markup.
-            return getattr(self, 'is_xml', False)
-        return self.parent._is_xml
+        is_xml = self._is_xml_cached
+        if is_xml is None:
+            if self.parent is None:
+                # This is the top-level object. It should have .is_xml set
+                # from tree creation. If not, take a guess--BS is usually
+                # used on HTML markup.
+                is_xml = bool(getattr(self, 'is_xml', False))
+            else:
+                is_xml = self.parent._is_xml
+            self._is_xml_cached = is_xml
+        return is_xml
+
+    # The two formatter tables above are kept for compatibility; this
+    # pre-resolved (is_xml, name) table answers the actual lookup with
+    # one dict probe, defaults included.
+    _FORMATTER_LOOKUP = {
+        (False, "html"): HTMLAwareEntitySubstitution.substitute_html,
+        (False, "minimal"): HTMLAwareEntitySubstitution.substitute_xml,
+        (False, None): None,
+        (True, "html"): EntitySubstitution.substitute_html,
+        (True, "minimal"): EntitySubstitution.substitute_xml_containing_entities,
+        (True, None): None,
+    }
 
     def _formatter_for_name(self, name):
         "Look up a formatter function based on its name and the tree."
-        if self._is_xml:
-            return self.XML_FORMATTERS.get(
-                name, EntitySubstitution.substitute_xml)
-        else:
-            return self.HTML_FORMATTERS.get(
-                name, HTMLAwareEntitySubstitution.substitute_xml)
+        is_xml = self._is_xml
+        try:
+            return self._FORMATTER_LOOKUP[(is_xml, name)]
+        except KeyError:
+            if is_xml:
+                return EntitySubstitution.substitute_xml
+            return HTMLAwareEntitySubstitution.substitute_xml
 
     def setup(self, parent=None, previous_element=None, next_element=None,
               previous_sibling=None, next_sibling=None):
         """Sets up the initial relations between this element and
         other elements."""
         self.parent = parent
+        if parent is not None and parent._is_xml_cached is not None:
+            # Propagate the tree type down as elements are linked in,
+            # so serialization never has to walk back up to the root.
+            self._is_xml_cached = parent._is_xml_cached
 
+        # setup() runs once per parsed element, so link through the
+        # local names rather than re-reading the attributes just set.
         self.previous_element = previous_element
         if previous_element is not None:
-            self.previous_element.next_element = self
+            previous_element.next_element = self
 
         self.next_element = next_element
-        if self.next_element:
-            self.next_element.previous_element = self
+        if next_element is not None:
+            next_element.previous_element = self
 
         self.next_sibling = next_sibling
-        if self.next_sibling:
-            self.next_sibling.previous_sibling = self
+        if next_sibling is not None:
+            next_sibling.previous_sibling = self
 
-        if (not previous_sibling
-            and self.parent is not None and self.parent.contents):
-            previous_sibling = self.parent.contents[-1]
+        if (previous_sibling is None
+            and parent is not None and parent.contents):
+            previous_sibling = parent.contents[-1]
 
         self.previous_sibling = previous_sibling
-        if previous_sibling:
-            self.previous_sibling.next_sibling = self
+        if previous_sibling is not None:
+            previous_sibling.next_sibling = self
 
     nextSibling = _alias("next_sibling")  # BS3
     previousSibling = _alias("previous_sibling")  # BS3
@@ -303,6 +575,9 @@ class PageElement(object):
         last_child.next_element = None
 
         self.parent = None
+        # The tree type was inherited from the old parent; recompute
+        # lazily (or from the new parent) once re-attached.
+        self._is_xml_cached = None
         if (self.previous_sibling is not None
             and self.previous_sibling != self.next_sibling):
             self.previous_sibling.next_sibling = self.next_sibling
@@ -315,12 +590,17 @@ class PageElement(object):
     def _last_descendant(self, is_initialized=True, accept_self=True):
         "Finds the last element beneath this object to be parsed."
         if is_initialized and self.next_sibling:
+            # The tree links already know the answer: the element
+            # right before our next sibling is our last descendant.
             last_child = self.next_sibling.previous_element
         else:
             last_child = self
-            while isinstance(last_child, Tag) and last_child.contents:
-                last_child = last_child.contents[-1]
-        if not accept_self and last_child == self:
+            while isinstance(last_child, Tag):
+                contents = last_child.contents
+                if not contents:
+                    break
+                last_child = contents[-1]
+        if not accept_self and last_child is self:
             last_child = None
         return last_child
     # BS3: Not part of the API!
@@ -348,6 +628,16 @@ class PageElement(object):
             new_child.extract()
 
         new_child.parent = self
+        cached_is_xml = self._is_xml_cached
+        if new_child._is_xml_cached is not cached_is_xml:
+            # The child is changing trees, and the stale tree type was
+            # propagated through its whole subtree when it was first
+            # linked in. Restamp (or clear) the subtree to match the
+            # new parent; moves within one tree skip this entirely.
+            new_child._is_xml_cached = cached_is_xml
+            if isinstance(new_child, Tag):
+                for descendant in new_child.descendants:
+                    descendant._is_xml_cached = cached_is_xml
         previous_child = None
         if position == 0:
             new_child.previous_sibling = None
@@ -389,6 +679,7 @@ class PageElement(object):
         if new_childs_last_element.next_element is not None:
             new_childs_last_element.next_element.previous_element = new_childs_last_element
         self.contents.insert(position, new_child)
+        new_child._index_hint = position
 
     def append(self, tag):
         """Appends the given tag to the contents of this tag."""
@@ -432,13 +723,13 @@ class PageElement(object):
         index = parent.index(self)
         parent.insert(index+1, successor)
 
-    def find_next(self, name=None, attrs=OrderedDict(), text=None, **kwargs):
+    def find_next(self, name=None, attrs=_NO_ATTRS, text=None, **kwargs):
         """Returns the first item that matches the given criteria and
         appears after this Tag in the document."""
         return self._find_one(self.find_all_next, name, attrs, text, **kwargs)
     findNext = find_next  # BS3
 
-    def find_all_next(self, name=None, attrs=OrderedDict(), text=None, limit=None,
+    def find_all_next(self, name=None, attrs=_NO_ATTRS, text=None, limit=None,
                     **kwargs):
         """Returns all items that match the given criteria and appear
         after this Tag in the document."""
@@ -446,14 +737,14 @@ class PageElement(object):
                              **kwargs)
     findAllNext = find_all_next  # BS3
 
-    def find_next_sibling(self, name=None, attrs=OrderedDict(), text=None, **kwargs):
+    def find_next_sibling(self, name=None, attrs=_NO_ATTRS, text=None, **kwargs):
         """Returns the closest sibling to this Tag that matches the
         given criteria and appears after this Tag in the document."""
         return self._find_one(self.find_next_siblings, name, attrs, text,
                              **kwargs)
     findNextSibling = find_next_sibling  # BS3
 
-    def find_next_siblings(self, name=None, attrs=OrderedDict(), text=None, limit=None,
+    def find_next_siblings(self, name=None, attrs=_NO_ATTRS, text=None, limit=None,
                            **kwargs):
         """Returns the siblings of this Tag that match the given
         criteria and appear after this Tag in the document."""
@@ -462,14 +753,14 @@ class PageElement(object):
     findNextSiblings = find_next_siblings   # BS3
     fetchNextSiblings = find_next_siblings  # BS2
 
-    def find_previous(self, name=None, attrs=OrderedDict(), text=None, **kwargs):
+    def find_previous(self, name=None, attrs=_NO_ATTRS, text=None, **kwargs):
         """Returns the first item that matches the given criteria and
         appears before this Tag in the document."""
         return self._find_one(
             self.find_all_previous, name, attrs, text, **kwargs)
     findPrevious = find_previous  # BS3
 
-    def find_all_previous(self, name=None, attrs=OrderedDict(), text=None, limit=None,
+    def find_all_previous(self, name=None, attrs=_NO_ATTRS, text=None, limit=None,
                         **kwargs):
         """Returns all items that match the given criteria and appear
         before this Tag in the document."""
@@ -478,14 +769,14 @@ class PageElement(object):
     findAllPrevious = find_all_previous  # BS3
     fetchPrevious = find_all_previous    # BS2
 
-    def find_previous_sibling(self, name=None, attrs=OrderedDict(), text=None, **kwargs):
+    def find_previous_sibling(self, name=None, attrs=_NO_ATTRS, text=None, **kwargs):
         """Returns the closest sibling to this Tag that matches the
         given criteria and appears before this Tag in the document."""
         return self._find_one(self.find_previous_siblings, name, attrs, text,
                              **kwargs)
     findPreviousSibling = find_previous_sibling  # BS3
 
-    def find_previous_siblings(self, name=None, attrs=OrderedDict(), text=None,
+    def find_previous_siblings(self, name=None, attrs=_NO_ATTRS, text=None,
                                limit=None, **kwargs):
         """Returns the siblings of this Tag that match the given
         criteria and appear before this Tag in the document."""
@@ -494,7 +785,7 @@ class PageElement(object):
     findPreviousSiblings = find_previous_siblings   # BS3
     fetchPreviousSiblings = find_previous_siblings  # BS2
 
-    def find_parent(self, name=None, attrs=OrderedDict(), **kwargs):
+    def find_parent(self, name=None, attrs=_NO_ATTRS, **kwargs):
         """Returns the closest parent of this Tag that matches the given
         criteria."""
         # NOTE: We can't use _find_one because findParents takes a different
@@ -506,7 +797,7 @@ class PageElement(object):
         return r
     findParent = find_parent  # BS3
 
-    def find_parents(self, name=None, attrs=OrderedDict(), limit=None, **kwargs):
+    def find_parents(self, name=None, attrs=_NO_ATTRS, limit=None, **kwargs):
         """Returns the parents of this Tag that match the given
         criteria."""
 
@@ -545,23 +836,24 @@ class PageElement(object):
             strainer = SoupStrainer(name, attrs, text, **kwargs)
 
         if text is None and not limit and not attrs and not kwargs:
+            # These results were produced through a generator
+            # expression, but every caller consumes the ResultSet
+            # eagerly, so a list comprehension does the same work
+            # without stacking a second generator frame on top of the
+            # traversal generator.
             if name is True or name is None:
                 # Optimization to find all tags.
-                result = (element for element in generator
-                          if isinstance(element, Tag))
+                result = [element for element in generator
+                          if isinstance(element, Tag)]
                 return ResultSet(strainer, result)
             elif isinstance(name, str):
                 # Optimization to find all tags with a given name.
-                result = (element for element in generator
+                result = [element for element in generator
                           if isinstance(element, Tag)
-                            and element.name == name)
+                            and element.name == name]
                 return ResultSet(strainer, result)
         results = ResultSet(strainer)
-        while True:
-            try:
-                i = next(generator)
-            except StopIteration:
-                break
+        for i in generator:
             if i:
                 found = strainer.search(i)
                 if found:
@@ -609,8 +901,6 @@ class PageElement(object):
 
     # Methods for supporting CSS selectors.
 
-    tag_name_re = re.compile('^[a-zA-Z0-9][-.a-zA-Z0-9:_]*$')
-
     # /^([a-zA-Z0-9][-.a-zA-Z0-9:_]*)\[(\w+)([=~\|\^\$\*]?)=?"?([^\]"]*)"?\]$/
     #   \---------------------------/  \---/\-------------/    \-------/
     #     |                              |         |               |
@@ -618,10 +908,8 @@ class PageElement(object):
     #     |                              |    ~,|,^,$,* or =
     #     |                           Attribute
     #    Tag
-    attribselect_re = re.compile(
-        r'^(?P<tag>[a-zA-Z0-9][-.a-zA-Z0-9:_]*)?\[(?P<attribute>[\w-]+)(?P<operator>[=~\|\^\$\*]?)' +
-        r'=?"?(?P<value>[^\]"]*)"?\]$'
-        )
+    tag_name_re = _TAG_NAME_RE
+    attribselect_re = _ATTRIBSELECT_RE
 
     def _attr_value_as_string(self, value, default=None):
         """Force an attribute value into a string representation.
@@ -647,41 +935,63 @@ class PageElement(object):
 
         Takes an operator, attribute and optional value. Returns a
         function that will return True for elements that match that
-        combination.
+        combination. The functions are pure, so one is built per
+        distinct (operator, attribute, value) triple and shared by
+        every selector that uses it.
         """
+        key = (operator, attribute, value)
+        checker = _ATTRIBUTE_CHECKERS.get(key)
+        if checker is None:
+            checker = self._build_attribute_checker(
+                operator, attribute, value)
+            if len(_ATTRIBUTE_CHECKERS) > 512:
+                _ATTRIBUTE_CHECKERS.clear()
+            _ATTRIBUTE_CHECKERS[key] = checker
+        return checker
+
+    def _build_attribute_checker(self, operator, attribute, value):
+        # These checkers run once per candidate tag, so they read the
+        # attribute value directly and keep any derived constants
+        # (like the '|' operator's dashed prefix) out of the per-call
+        # path.
+        def _as_string(el, default=None):
+            attribute_value = el.attrs.get(attribute, default)
+            if isinstance(attribute_value, (list, tuple)):
+                attribute_value = " ".join(attribute_value)
+            return attribute_value
+
         if operator == '=':
             # string representation of `attribute` is equal to `value`
-            return lambda el: el._attr_value_as_string(attribute) == value
+            return lambda el: _as_string(el) == value
         elif operator == '~':
             # space-separated list representation of `attribute`
             # contains `value`
             def _includes_value(element):
-                attribute_value = element.get(attribute, [])
+                attribute_value = element.attrs.get(attribute, [])
                 if not isinstance(attribute_value, list):
                     attribute_value = attribute_value.split()
                 return value in attribute_value
             return _includes_value
         elif operator == '^':
             # string representation of `attribute` starts with `value`
-            return lambda el: el._attr_value_as_string(
-                attribute, '').startswith(value)
+            return lambda el: _as_string(el, '').startswith(value)
         elif operator == '$':
             # string represenation of `attribute` ends with `value`
-            return lambda el: el._attr_value_as_string(
-                attribute, '').endswith(value)
+            return lambda el: _as_string(el, '').endswith(value)
         elif operator == '*':
             # string representation of `attribute` contains `value`
-            return lambda el: value in el._attr_value_as_string(attribute, '')
+            return lambda el: value in _as_string(el, '')
         elif operator == '|':
             # string representation of `attribute` is either exactly
             # `value` or starts with `value` and then a dash.
+            value_with_dash = value + '-'
             def _is_or_starts_with_dash(element):
-                attribute_value = element._attr_value_as_string(attribute, '')
-                return (attribute_value == value or attribute_value.startswith(
-                        value + '-'))
+                attribute_value = _as_string(element, '')
+                return (attribute_value == value
+                        or attribute_value.startswith(value_with_dash))
             return _is_or_starts_with_dash
         else:
-            return lambda el: el.has_attr(attribute)
+            return lambda el: attribute in el.attrs
 
     # Old non-property versions of the generators, for backwards
     # compatibility with BS3.
@@ -706,6 +1016,17 @@ class NavigableString(str, PageElement):
     PREFIX = ''
     SUFFIX = ''
 
+    # A fresh string starts out unlinked, so rather than calling
+    # setup() from __new__ to write five None attributes on every
+    # string created, let the unlinked state come from these class
+    # defaults. setup() overwrites them with instance attributes when
+    # the string is attached to a tree.
+    parent = None
+    previous_element = None
+    next_element = None
+    previous_sibling = None
+    next_sibling = None
+
     def __new__(cls, value):
         """Create a new NavigableString.
 
@@ -718,7 +1039,6 @@ class NavigableString(str, PageElement):
             u = str.__new__(cls, value)
         else:
             u = str.__new__(cls, value, DEFAULT_OUTPUT_ENCODING)
-        u.setup()
         return u
 
     def __copy__(self):
@@ -730,16 +1050,21 @@ class NavigableString(str, PageElement):
     def __getnewargs__(self):
         return (str(self),)
 
-    def __getattr__(self, attr):
+    @property
+    def string(self):
         """text.string gives you text. This is for backwards
         compatibility for Navigable*String, but for CData* it lets you
-        get the string without the CData wrapper."""
-        if attr == 'string':
-            return self
-        else:
-            raise AttributeError(
-                "'%s' object has no attribute '%s'" % (
-                    self.__class__.__name__, attr))
+        get the string without the CData wrapper.
+
+        A real property rather than a __getattr__ special case, so the
+        lookup doesn't go through attribute-miss handling every time.
+        """
+        return self
+
+    def __getattr__(self, attr):
+        raise AttributeError(
+            "'%s' object has no attribute '%s'" % (
+                self.__class__.__name__, attr))
 
     def output_ready(self, formatter="minimal"):
         output = self.format_string(self, formatter)
@@ -809,6 +1134,29 @@ class Tag(PageElement):
 
     """Represents a found HTML tag with its attributes and contents."""
 
+    # The core tag state lives in slots: on documents with hundreds of
+    # thousands of tags this cuts per-tag memory considerably and makes
+    # access to the navigation pointers a fixed-offset read. '__dict__'
+    # stays in the layout because callers (the gumbo adapter, the soup
+    # object itself) hang extra attributes off tags at will.
+    __slots__ = ('parser_class', 'name', 'namespace', 'prefix', 'attrs',
+                 'contents', 'hidden', 'can_be_empty_element', 'parent',
+                 'previous_element', 'next_element', 'previous_sibling',
+                 'next_sibling', '__dict__')
+
+    # Cached (insertion-order key tuple, sorted key list) pair used by
+    # _attribute_strings(). A class-level default keeps __getattr__ out
+    # of the picture on tags that have never been serialized.
+    _sorted_attrs_cache = None
+
+    # Cached (class attribute value, frozenset of it) pair used by the
+    # CSS class selector. See classes_match in _parse_selector_token.
+    _class_set_cache = None
+
+    # Generation stamp used by select() to deduplicate matches without
+    # keeping a visited set per query.
+    _select_gen = 0
+
     def __init__(self, parser=None, builder=None, name=None, namespace=None,
                  prefix=None, attrs=None, parent=None, previous=None):
         "Basic constructor."
@@ -821,19 +1169,24 @@ class Tag(PageElement):
             self.parser_class = parser.__class__
         if name is None:
             raise ValueError("No value provided for new tag's name.")
+        if name.__class__ is str:
+            # Interned names make the many equality checks against
+            # tag-category constants and search criteria identity
+            # comparisons in the common case.
+            name = sys.intern(name)
         self.name = name
         self.namespace = namespace
         self.prefix = prefix
         if attrs is None:
-            attrs = OrderedDict()
+            attrs = {}
         elif attrs:
             if builder is not None and builder.cdata_list_attributes:
                 attrs = builder._replace_cdata_list_attribute_values(
                     self.name, attrs)
             else:
-                attrs = OrderedDict(attrs)
+                attrs = dict(attrs)
         else:
-            attrs = OrderedDict(attrs)
+            attrs = dict(attrs)
         self.attrs = attrs
         self.contents = []
         self.setup(parent, previous)
@@ -848,16 +1201,35 @@ class Tag(PageElement):
 
     parserClass = _alias("parser_class")  # BS3
 
+    def _clone_shallow(self):
+        """A childless copy of this tag, unconnected to any tree."""
+        clone = type(self)(None, None, self.name, self.namespace,
+                           self.prefix, self.attrs)
+        clone.can_be_empty_element = self.can_be_empty_element
+        clone.hidden = self.hidden
+        return clone
+
     def __copy__(self):
         """A copy of a Tag is a new Tag, unconnected to the parse tree.
         Its contents are a copy of the old Tag's contents.
         """
-        clone = type(self)(None, self.builder, self.name, self.namespace,
-                           self.nsprefix, self.attrs)
-        for attr in ('can_be_empty_element', 'hidden'):
-            setattr(clone, attr, getattr(self, attr))
-        for child in self.contents:
-            clone.append(child.__copy__())
+        clone = self._clone_shallow()
+        # Clone the subtree with an explicit stack of (source, clone)
+        # pairs rather than one Python call frame per level. The old
+        # recursive version also looked up self.builder and
+        # self.nsprefix, neither of which exists on a Tag, so every
+        # level fell into __getattr__ and ran a find() over its whole
+        # subtree -- quadratic, and it silently dropped the prefix.
+        stack = [(self, clone)]
+        while stack:
+            src, dst = stack.pop()
+            for child in src.contents:
+                if isinstance(child, Tag):
+                    child_clone = child._clone_shallow()
+                    dst.append(child_clone)
+                    stack.append((child, child_clone))
+                else:
+                    dst.append(child.__copy__())
         return clone
 
     @property
@@ -875,7 +1247,7 @@ class Tag(PageElement):
         If the builder has no designated list of empty-element tags,
         then any tag with no contents is an empty-element tag.
         """
-        return len(self.contents) == 0 and self.can_be_empty_element
+        return not self.contents and self.can_be_empty_element
     isSelfClosing = is_empty_element  # BS3
 
     @property
@@ -912,17 +1284,26 @@ class Tag(PageElement):
         By default, yields only NavigableString and CData objects. So
         no comments, processing instructions, etc.
         """
-        for descendant in self.descendants:
-            if (
-                (types is None and not isinstance(descendant, NavigableString))
-                or
-                (types is not None and type(descendant) not in types)):
-                continue
-            if strip:
-                descendant = descendant.strip()
-                if len(descendant) == 0:
+        # Pick the filtering rule once instead of re-testing 'types'
+        # for every descendant.
+        if types is None:
+            for descendant in self.descendants:
+                if not isinstance(descendant, NavigableString):
+                    continue
+                if strip:
+                    descendant = descendant.strip()
+                    if not descendant:
+                        continue
+                yield descendant
+        else:
+            for descendant in self.descendants:
+                if type(descendant) not in types:
                     continue
-            yield descendant
+                if strip:
+                    descendant = descendant.strip()
+                    if not descendant:
+                        continue
+                yield descendant
 
     strings = property(_all_strings)
 
@@ -936,8 +1317,7 @@ class Tag(PageElement):
         """
         Get all child strings, concatenated using the given separator.
         """
-        return separator.join([s for s in self._all_strings(
-                    strip, types=types)])
+        return separator.join(self._all_strings(strip, types=types))
     getText = get_text
     text = property(get_text)
 
@@ -948,6 +1328,13 @@ class Tag(PageElement):
         while i is not None:
             next = i.next_element
             i.__dict__.clear()
+            if isinstance(i, Tag):
+                # The core state lives in slots, not the dict; drop
+                # those references too so the subtree can be collected.
+                i.parser_class = i.parent = None
+                i.previous_element = i.next_element = None
+                i.previous_sibling = i.next_sibling = None
+                i.attrs = {}
             i.contents = []
             i = next
 
@@ -970,7 +1357,15 @@ class Tag(PageElement):
         Find the index of a child by identity, not value. Avoids issues with
         tag.contents.index(element) getting the index of equal elements.
         """
-        for i, child in enumerate(self.contents):
+        contents = self.contents
+        hint = element._index_hint
+        if (hint is not None and hint < len(contents)
+            and contents[hint] is element):
+            return hint
+        for i, child in enumerate(contents):
+            # Refresh every hint we pass over, so a run of index() calls
+            # against the same parent only pays for one linear scan.
+            child._index_hint = i
             if child is element:
                 return i
         raise ValueError("Tag.index: element not in tag")
@@ -985,7 +1380,16 @@ class Tag(PageElement):
         return key in self.attrs
 
     def __hash__(self):
-        return str(self).__hash__()
+        # Hashing used to serialize the whole subtree via str(self) --
+        # an O(N) walk for every dict or set operation. Hash the cheap
+        # structural facts instead; tags equal under __eq__ (same name,
+        # attrs and contents) always agree on these.
+        items = []
+        for k, v in sorted(self.attrs.items()):
+            if isinstance(v, (list, tuple)):
+                v = tuple(v)
+            items.append((k, v))
+        return hash((self.name, tuple(items), len(self.contents)))
 
     def __getitem__(self, key):
         """tag[key] returns the value of the 'key' attribute for the tag,
@@ -1028,33 +1432,41 @@ class Tag(PageElement):
 
     def __getattr__(self, tag):
         #print "Getattr %s.%s" % (self.__class__, tag)
-        if len(tag) > 3 and tag.endswith('Tag'):
+        # The common case -- soup.div, tag.a -- lands here on every
+        # miss, so test it with plain slicing before anything else.
+        # Underscored names never map to real tags, and 'contents' is
+        # special-cased to avoid recursion.
+        if not tag or tag[0] == '_' or tag == 'contents':
+            raise AttributeError(
+                "'%s' object has no attribute '%s'" % (self.__class__, tag))
+        if len(tag) > 3 and tag[-3:] == 'Tag':
             # BS3: soup.aTag -> "soup.find("a")
             tag_name = tag[:-3]
             warnings.warn(
                 '.%sTag is deprecated, use .find("%s") instead.' % (
                     tag_name, tag_name))
             return self.find(tag_name)
-        # We special case contents to avoid recursion.
-        elif not tag.startswith("__") and not tag=="contents":
-            return self.find(tag)
-        raise AttributeError(
-            "'%s' object has no attribute '%s'" % (self.__class__, tag))
+        return self.find(tag)
 
     def __eq__(self, other):
         """Returns true iff this tag has the same name, the same attributes,
         and the same contents (recursively) as the given tag."""
         if self is other:
             return True
-        if (not hasattr(other, 'name') or
-            not hasattr(other, 'attrs') or
-            not hasattr(other, 'contents') or
-            self.name != other.name or
-            self.attrs != other.attrs or
-            len(self) != len(other)):
+        # Probe the cheap, highly discriminating fields first and let a
+        # missing attribute mean "not a tag" -- three hasattr() calls
+        # per comparison cost more than one exception on the rare
+        # non-tag operand.
+        try:
+            if (self.name != other.name or
+                len(self.contents) != len(other.contents) or
+                self.attrs != other.attrs):
+                return False
+            other_contents = other.contents
+        except AttributeError:
             return False
         for i, my_child in enumerate(self.contents):
-            if my_child != other.contents[i]:
+            if my_child != other_contents[i]:
                 return False
         return True
 
@@ -1079,6 +1491,19 @@ class Tag(PageElement):
         u = self.decode(indent_level, encoding, formatter, indent_chars)
         return u.encode(encoding, errors)
 
+    def _resolve_formatter(self, formatter):
+        """Turn a string formatter name into a function.
+
+        Every serializer calls this on entry; once the top-level call
+        has resolved the name, the recursive calls pass the function
+        straight back through, and the C-level callable() test is far
+        cheaper than probing the collections.abc.Callable ABC on every
+        node.
+        """
+        if formatter is None or callable(formatter):
+            return formatter
+        return self._formatter_for_name(formatter)
+
     def _should_pretty_print(self, indent_level):
         """Should this tag be pretty-printed?"""
         return (
@@ -1087,31 +1512,30 @@ class Tag(PageElement):
               and self.name not in NON_BREAKING_INLINE_TAGS)
              or self._is_xml))
 
-    def decode(self, indent_level=None,
-               eventual_encoding=DEFAULT_OUTPUT_ENCODING,
-               formatter="minimal", indent_chars=" "):
-        """Returns a Unicode representation of this tag and its contents.
+    def _attribute_strings(self, eventual_encoding, formatter):
+        """Render this tag's attributes as a sorted list of 'key="val"'
+        strings, shared by all of the serializers.
 
-        :param eventual_encoding: The tag is destined to be
-           encoded into this encoding. This method is _not_
-           responsible for performing that encoding. This information
-           is passed in so that it can be substituted in if the
-           document contains a <META> tag that mentions the document's
-           encoding.
+        'formatter' must already be resolved to a function (or None).
         """
-
-        # First off, turn a string formatter into a function. This
-        # will stop the lookup from happening over and over again.
-        if not isinstance(formatter, Callable):
-            formatter = self._formatter_for_name(formatter)
-
+        tag_attrs = self.attrs
         attrs = []
-        if self.attrs:
-            for key, val in sorted(self.attrs.items()):
+        if tag_attrs:
+            # Serializing the same tree more than once (prettify() then
+            # encode(), say) kept re-sorting identical key sets. Cache
+            # the sorted order, keyed on the insertion-order key tuple
+            # so any rename/add/delete naturally invalidates it.
+            keys = tuple(tag_attrs)
+            cached = self._sorted_attrs_cache
+            if cached is None or cached[0] != keys:
+                cached = (keys, sorted(tag_attrs))
+                self._sorted_attrs_cache = cached
+            for key in cached[1]:
+                val = tag_attrs[key]
                 if val is None:
                     decoded = key
                 else:
-                    if isinstance(val, list) or isinstance(val, tuple):
+                    if isinstance(val, (list, tuple)):
                         val = ' '.join(val)
                     elif not isinstance(val, str):
                         val = str(val)
@@ -1125,6 +1549,40 @@ class Tag(PageElement):
                         str(key) + '='
                         + EntitySubstitution.quoted_attribute_value(text))
                 attrs.append(decoded)
+        return attrs
+
+    def decode(self, indent_level=None,
+               eventual_encoding=DEFAULT_OUTPUT_ENCODING,
+               formatter="minimal", indent_chars=" "):
+        """Returns a Unicode representation of this tag and its contents.
+
+        :param eventual_encoding: The tag is destined to be
+           encoded into this encoding. This method is _not_
+           responsible for performing that encoding. This information
+           is passed in so that it can be substituted in if the
+           document contains a <META> tag that mentions the document's
+           encoding.
+        """
+
+        formatter = self._resolve_formatter(formatter)
+
+        s = []
+        self._decode_into(
+            s, indent_level, eventual_encoding, formatter, indent_chars)
+        return ''.join(s)
+
+    def _decode_into(self, buf, indent_level, eventual_encoding,
+                     formatter, indent_chars):
+        """Render this tag and its contents into the shared list 'buf'.
+
+        This is the engine behind decode()/decode_contents(). Every
+        fragment of output goes into one flat buffer that is joined
+        exactly once at the top of the recursion, instead of each tag
+        joining (and its parent re-copying) its own subtree. Empty
+        strings are never appended, so buf[-1] can stand in for the
+        "does the output so far end with a newline?" test.
+        """
+        attrs = self._attribute_strings(eventual_encoding, formatter)
         close = ''
         closeTag = ''
 
@@ -1132,7 +1590,9 @@ class Tag(PageElement):
         if self.prefix:
             prefix = self.prefix + ":"
 
-        if self.is_empty_element:
+        # Inlined is_empty_element: skip the property descriptor in this
+        # per-tag hot path.
+        if not self.contents and self.can_be_empty_element:
             close = '/'
         else:
             closeTag = '</%s%s>' % (prefix, self.name)
@@ -1141,44 +1601,45 @@ class Tag(PageElement):
         space = ''
         indent_space = ''
         if indent_level is not None:
-            indent_space = (indent_chars * (indent_level - 1))
+            indent_space = _indent(indent_chars, indent_level)
         if pretty_print:
             space = indent_space
             indent_contents = indent_level + 1
         else:
             indent_contents = None
-        contents = self.decode_contents(
-            indent_contents, eventual_encoding, formatter, indent_chars)
 
         if self.hidden:
             # This is the 'document root' object.
-            s = contents
-        else:
-            s = []
-            attribute_string = ''
-            if attrs:
-                attribute_string = ' ' + ' '.join(attrs)
-            if indent_level is not None:
-                # Even if this particular tag is not pretty-printed,
-                # we should indent up to the start of the tag.
-                s.append(indent_space)
-            s.append('<%s%s%s%s>' % (
-                    prefix, self.name, attribute_string, close))
-            if pretty_print:
-                s.append("\n")
-            s.append(contents)
-            if pretty_print and contents and contents[-1] != "\n":
-                s.append("\n")
-            if pretty_print and closeTag:
-                s.append(space)
-            s.append(closeTag)
-            if indent_level is not None and closeTag and self.next_sibling:
-                # Even if this particular tag is not pretty-printed,
-                # we're now done with the tag, and we should add a
-                # newline if appropriate.
-                s.append("\n")
-            s = ''.join(s)
-        return s
+            self._decode_contents_into(
+                buf, indent_contents, eventual_encoding, formatter,
+                indent_chars)
+            return
+
+        attribute_string = ''
+        if attrs:
+            attribute_string = ' ' + ' '.join(attrs)
+        if indent_level is not None and indent_space:
+            # Even if this particular tag is not pretty-printed,
+            # we should indent up to the start of the tag.
+            buf.append(indent_space)
+        buf.append('<%s%s%s%s>' % (
+                prefix, self.name, attribute_string, close))
+        if pretty_print:
+            buf.append("\n")
+        mark = len(buf)
+        self._decode_contents_into(
+            buf, indent_contents, eventual_encoding, formatter, indent_chars)
+        if pretty_print and len(buf) > mark and buf[-1][-1] != "\n":
+            buf.append("\n")
+        if pretty_print and closeTag and space:
+            buf.append(space)
+        if closeTag:
+            buf.append(closeTag)
+        if indent_level is not None and closeTag and self.next_sibling:
+            # Even if this particular tag is not pretty-printed,
+            # we're now done with the tag, and we should add a
+            # newline if appropriate.
+            buf.append("\n")
 
     def prettify(self, encoding=None, formatter="minimal", indent_chars=" "):
         if encoding is None:
@@ -1204,58 +1665,53 @@ class Tag(PageElement):
         :param formatter: The output formatter responsible for converting
            entities to Unicode characters.
         """
-        # First off, turn a string formatter into a function. This
-        # will stop the lookup from happening over and over again.
-        if not isinstance(formatter, Callable):
-            formatter = self._formatter_for_name(formatter)
+        formatter = self._resolve_formatter(formatter)
 
-        pretty_print = (indent_level is not None)
         s = []
-        for c in self:
+        self._decode_contents_into(
+            s, indent_level, eventual_encoding, formatter, indent_chars)
+        return ''.join(s)
+
+    def _decode_contents_into(self, buf, indent_level, eventual_encoding,
+                              formatter, indent_chars):
+        """Render this tag's children into the shared list 'buf'.
+
+        See _decode_into() for the buffer contract.
+        """
+        pretty_print = (indent_level is not None)
+        in_pre = (self.name == 'pre')
+        # Bind the hot names once; this loop runs for every node in the
+        # document and the bytecode for a local load is far cheaper than
+        # repeated attribute and global lookups.
+        append = buf.append
+        ind = _indent(indent_chars, indent_level) if pretty_print else ''
+        for c in self.contents:
             text = None
-            if isinstance(c, NavigableString):
+            kind = _node_kind(c.__class__)
+            if kind == _KIND_TAG:
+                c._decode_into(buf, indent_level, eventual_encoding,
+                               formatter, indent_chars)
+            elif kind:
+                # Any NavigableString flavor, comments and CDATA included.
                 text = c.output_ready(formatter)
-            elif isinstance(c, Tag):
-                s.append(c.decode(indent_level, eventual_encoding, formatter, indent_chars))
-            if text and indent_level and not self.name == 'pre':
+            if text and indent_level and not in_pre:
                 text = text.strip()
             if text:
-                if pretty_print and not self.name == 'pre':
-                    s.append(indent_chars * (indent_level - 1))
-                s.append(text)
-                if pretty_print and not self.name == 'pre':
-                    s.append("\n")
-        return ''.join(s)
+                if pretty_print and not in_pre:
+                    if ind:
+                        append(ind)
+                    append(text)
+                    append("\n")
+                else:
+                    append(text)
 
     def decodexml(self, indent_level=0, eventual_encoding=DEFAULT_OUTPUT_ENCODING, 
                formatter="minimal", indent_chars=" "):
 
-        # First off, turn a string formatter into a function. This
-        # will stop the lookup from happening over and over again.
-        if not isinstance(formatter, Callable):
-            formatter = self._formatter_for_name(formatter)
+        formatter = self._resolve_formatter(formatter)
 
         is_xmlparent = self.name.lower() in EBOOK_XML_PARENT_TAGS
-        attrs = []
-        if self.attrs:
-            for key, val in sorted(self.attrs.items()):
-                if val is None:
-                    decoded = key
-                else:
-                    if isinstance(val, list) or isinstance(val, tuple):
-                        val = ' '.join(val)
-                    elif not isinstance(val, str):
-                        val = str(val)
-                    elif (
-                        isinstance(val, AttributeValueWithCharsetSubstitution)
-                        and eventual_encoding is not None):
-                        val = val.encode(eventual_encoding)
-
-                    text = self.format_string(val, formatter)
-                    decoded = (
-                        str(key) + '='
-                        + EntitySubstitution.quoted_attribute_value(text))
-                attrs.append(decoded)
+        attrs = self._attribute_strings(eventual_encoding, formatter)
 
         prefix = ''
         if self.prefix:
@@ -1265,17 +1721,19 @@ class Tag(PageElement):
         # "contents" should be treated as empty
         if self.can_be_empty_element:
             tagcontents = self.string
-            if tagcontents is not None and len(tagcontents.strip()) == 0:
+            if tagcontents is not None and (
+                    not tagcontents or tagcontents.isspace()):
                 self.contents = []
         
         close = ''
         closeTag = ''
-        if self.is_empty_element:
+        is_empty = not self.contents and self.can_be_empty_element
+        if is_empty:
             close = '/'
         else:
             closeTag = '</%s%s>' % (prefix, self.name)
 
-        indent_space = (indent_chars * (indent_level - 1))
+        indent_space = _indent(indent_chars, indent_level)
         indent_contents = indent_level
         if is_xmlparent or self.hidden:
             indent_contents = indent_level + 1
@@ -1294,7 +1752,7 @@ class Tag(PageElement):
             if is_xmlparent:
                 s.append("\n")
             s.append(contents)
-            if contents and contents[-1] != "\n" and is_xmlparent or self.is_empty_element:
+            if contents and contents[-1] != "\n" and is_xmlparent or is_empty:
                 s.append("\n")
             if closeTag and is_xmlparent:
                 s.append(indent_space)
@@ -1308,69 +1766,55 @@ class Tag(PageElement):
                         formatter="minimal", indent_chars=" "):
         """Renders the contents of this tag as a Unicode string.
         """
-        # First off, turn a string formatter into a function. This
-        # will stop the lookup from happening over and over again.
-        if not isinstance(formatter, Callable):
-            formatter = self._formatter_for_name(formatter)
+        formatter = self._resolve_formatter(formatter)
 
         is_xmlparent = self.name.lower() in EBOOK_XML_PARENT_TAGS
         s = []
-        for c in self:
+        for c in self.contents:
             text = None
-            if isinstance(c, NavigableString):
-                text = c.output_ready(formatter)
-            elif isinstance(c, Tag):
+            kind = _node_kind(c.__class__)
+            if kind == _KIND_TAG:
                 val = c.decodexml(indent_level, eventual_encoding, formatter, indent_chars)
                 s.append(val)
+            elif kind:
+                text = c.output_ready(formatter)
             if text:
                 text = text.strip()
             if text:
-                if is_xmlparent and len(s) == 0:
-                    s.append(indent_chars * (indent_level - 1))
+                if is_xmlparent and not s:
+                    s.append(_indent(indent_chars, indent_level))
                 s.append(text)
         return ''.join(s)
 
     def serialize_xhtml(self, eventual_encoding=DEFAULT_OUTPUT_ENCODING, formatter="minimal"):
-        # First off, turn a string formatter into a function. This
-        # will stop the lookup from happening over and over again.
-        if not isinstance(formatter, Callable):
-            formatter = self._formatter_for_name(formatter)
+        formatter = self._resolve_formatter(formatter)
 
         prefix = ''
         close = ''
         closeTag = ''
-        attrs = []
-        if self.attrs:
-            for key, val in sorted(self.attrs.items()):
-                if val is None:
-                    ntext = key
-                else:
-                    if isinstance(val, list) or isinstance(val, tuple):
-                        val = ' '.join(val)
-                    elif not isinstance(val, str):
-                        val = str(val)
-                    elif (isinstance(val, AttributeValueWithCharsetSubstitution) and 
-                          eventual_encoding is not None):
-                        val = val.encode(eventual_encoding)
-                    text = self.format_string(val, formatter)
-                    ntext = (str(key) + '=' + EntitySubstitution.quoted_attribute_value(text))
-                attrs.append(ntext)
+        attrs = self._attribute_strings(eventual_encoding, formatter)
 
         contents = self.serialize_xhtml_contents(eventual_encoding, formatter)
 
+        flags = _tag_flags(self.name)
         in_xml_ns = self.namespace != 'http://www.w3.org/1999/xhtml'
-        testcontents = contents.strip()
 
         if self.prefix:
             prefix = self.prefix + ":"
 
-        if self.name in VOID_TAGS or (in_xml_ns and testcontents==""):
+        # Only the rare non-XHTML-namespace case needs to know whether
+        # the contents are blank; don't strip a potentially huge string
+        # for every ordinary tag.
+        if flags & _FLAG_VOID or (
+                in_xml_ns and (not contents or contents.isspace())):
             close = '/'
         else:
             closeTag = '</%s%s>' % (prefix, self.name)
 
+        is_special_handling = flags & _FLAG_SPECIAL_HANDLING
+
         # strip extraneous whitespace before the primary closing tag
-        if self.name in SPECIAL_HANDLING_TAGS:
+        if is_special_handling:
             contents = contents.strip()
             contents += "\n"
 
@@ -1383,77 +1827,52 @@ class Tag(PageElement):
             if attrs:
                 attribute_string = ' ' + ' '.join(attrs)
             s.append('<%s%s%s%s>' % (prefix, self.name, attribute_string, close))
-            if self.name in SPECIAL_HANDLING_TAGS:
+            if is_special_handling:
                 s.append("\n")
             s.append(contents)
             s.append(closeTag)
-            if self.name in SPECIAL_HANDLING_TAGS:
+            if is_special_handling:
                 s.append("\n")
             s = ''.join(s)
         return s
 
     def serialize_xhtml_contents(self, eventual_encoding=DEFAULT_OUTPUT_ENCODING, formatter="minimal"):
 
-        # First off, turn a string formatter into a function. This
-        # will stop the lookup from happening over and over again.
-        if not isinstance(formatter, Callable):
-            formatter = self._formatter_for_name(formatter)
+        formatter = self._resolve_formatter(formatter)
 
         s = []
-        for c in self:
-            text = None
-            if isinstance(c, Comment):
-                text = Comment(c).output_ready(formatter)
-                s.append(text)
-            elif isinstance(c, CData):
-                text = CData(c).output_ready(formatter)
-                s.append(text)
-            elif isinstance(c, NavigableString):
-                text = c.output_ready(formatter)
-                s.append(text)
-            elif isinstance(c, Tag):
-                s.append(c.serialize_xhtml(eventual_encoding, formatter))
+        append = s.append
+        for c in self.contents:
+            kind = _node_kind(c.__class__)
+            if kind == _KIND_TAG:
+                append(c.serialize_xhtml(eventual_encoding, formatter))
+            elif kind == _KIND_STRING:
+                append(c.output_ready(formatter))
+            elif kind == _KIND_COMMENT:
+                append(Comment(c).output_ready(formatter))
+            elif kind == _KIND_CDATA:
+                append(CData(c).output_ready(formatter))
         return ''.join(s)
 
     def prettyprint_xhtml(self, indent_level=0, eventual_encoding=DEFAULT_OUTPUT_ENCODING, 
                formatter="minimal", indent_chars=" "):
 
-        # First off, turn a string formatter into a function. This
-        # will stop the lookup from happening over and over again.
-        if not isinstance(formatter, Callable):
-            formatter = self._formatter_for_name(formatter)
+        formatter = self._resolve_formatter(formatter)
 
-        is_structural = self.name in STRUCTURAL_TAGS
-        is_inline = self.name in NON_BREAKING_INLINE_TAGS
+        flags = _tag_flags(self.name)
+        is_structural = flags & _FLAG_STRUCTURAL
+        is_inline = flags & _FLAG_INLINE
 
         # build attribute string
-        attribs = []
         atts = ""
-        if self.attrs:
-            for key, val in sorted(self.attrs.items()):
-                if val is None:
-                    decoded = key
-                else:
-                    if isinstance(val, list) or isinstance(val, tuple):
-                        val = ' '.join(val)
-                    elif not isinstance(val, str):
-                        val = str(val)
-                    elif (
-                        isinstance(val, AttributeValueWithCharsetSubstitution)
-                        and eventual_encoding is not None):
-                        val = val.encode(eventual_encoding)
-
-                    text = self.format_string(val, formatter)
-                    decoded = (
-                        str(key) + '='
-                        + EntitySubstitution.quoted_attribute_value(text))
-                attribs.append(decoded)
+        attribs = self._attribute_strings(eventual_encoding, formatter)
+        if attribs:
             atts = " " + " ".join(attribs)
 
 
         # get tag content
         contents=""
-        is_void_tag = self.name in VOID_TAGS
+        is_void_tag = flags & _FLAG_VOID
         if not is_void_tag:
             if is_structural:
                 contents = self.prettyprint_xhtml_contents(indent_level+1, eventual_encoding, formatter, indent_chars)
@@ -1465,25 +1884,25 @@ class Tag(PageElement):
             return contents
 
         in_xml_ns = self.namespace != 'http://www.w3.org/1999/xhtml'
-        testcontents = contents.strip()
-        single = self.name in VOID_TAGS or (in_xml_ns and testcontents == "")
+        single = is_void_tag or (
+            in_xml_ns and (not contents or contents.isspace()))
 
         prefix = ''
         if self.prefix:
             prefix = self.prefix + ":"
 
-        is_keepwhitespace = self.name in PRESERVE_WHITESPACE_TAGS
+        is_keepwhitespace = flags & _FLAG_PRESERVE_WHITESPACE
         if not is_keepwhitespace and not is_inline:
             contents = contents.rstrip()
 
-        indent_space = (indent_chars * (indent_level - 1))
+        indent_space = _indent(indent_chars, indent_level)
 
         # handle self-closed tags with no content first
         if single:
             selfclosetag = '<%s%s%s/>' % (prefix, self.name, atts)
             if is_inline:
                 # always add newline after br tags when they are children of structural tags
-                if (self.name == "br") and self.parent.name in STRUCTURAL_TAGS:
+                if (self.name == "br") and _tag_flags(self.parent.name) & _FLAG_STRUCTURAL:
                     selfclosetag += "\n"
                 return selfclosetag
             return indent_space + selfclosetag + "\n"
@@ -1491,37 +1910,42 @@ class Tag(PageElement):
         # handle the general case
         starttag = '<%s%s%s>' % (prefix, self.name, atts)
         closetag = '</%s%s>' % (prefix, self.name)
-        results = ""
+        s = []
         if is_structural:
-            results = indent_space + starttag
+            s.append(indent_space)
+            s.append(starttag)
             if contents != "":
-                results += "\n" + contents + "\n" + indent_space
-            results += closetag + "\n"
+                s.append("\n")
+                s.append(contents)
+                s.append("\n")
+                s.append(indent_space)
+            s.append(closetag)
+            s.append("\n")
         elif is_inline:
-            results = starttag
-            results += contents
-            results += closetag
+            s.append(starttag)
+            s.append(contents)
+            s.append(closetag)
         else:
-            results = indent_space + starttag
+            s.append(indent_space)
+            s.append(starttag)
             if not is_keepwhitespace:
                 contents = contents.lstrip()
-            results += contents
-            results += closetag + "\n"
-        return results
+            s.append(contents)
+            s.append(closetag)
+            s.append("\n")
+        return ''.join(s)
 
     def prettyprint_xhtml_contents(self, indent_level=0, eventual_encoding=DEFAULT_OUTPUT_ENCODING, 
                         formatter="minimal", indent_chars=" "):
         """Renders the contents of this tag as a Unicode string.
         """
-        # First off, turn a string formatter into a function. This
-        # will stop the lookup from happening over and over again.
-        if not isinstance(formatter, Callable):
-            formatter = self._formatter_for_name(formatter)
+        formatter = self._resolve_formatter(formatter)
 
-        is_structural = self.name in STRUCTURAL_TAGS
-        is_inline = self.name in NON_BREAKING_INLINE_TAGS
-        is_keepwhitespace = self.name in PRESERVE_WHITESPACE_TAGS
-        indent_space = (indent_chars * (indent_level - 1))
+        flags = _tag_flags(self.name)
+        is_structural = flags & _FLAG_STRUCTURAL
+        is_inline = flags & _FLAG_INLINE
+        is_keepwhitespace = flags & _FLAG_PRESERVE_WHITESPACE
+        indent_space = _indent(indent_chars, indent_level)
         last_char = "x"
         contains_block_tags = False
 
@@ -1532,22 +1956,24 @@ class Tag(PageElement):
 
         for c in self:
             text = None
-            if isinstance(c, Comment):
+            kind = _node_kind(c.__class__)
+            if kind == _KIND_COMMENT:
                 text = Comment(c).output_ready(formatter)
                 s.append(text)
-            elif isinstance(c, CData):
+            elif kind == _KIND_CDATA:
                 text = CData(c).output_ready(formatter)
                 s.append(text)
-            elif isinstance(c, NavigableString):
+            elif kind == _KIND_STRING:
                 text = c.output_ready(formatter)
-                tval = text
-                is_whitespace = (tval.strip() == "")
+                # isspace() bails on the first non-whitespace character
+                # without allocating a stripped copy of the text.
+                is_whitespace = (not text) or text.isspace()
 
                 # handle pure whitespace differently
                 if is_whitespace:
                     if is_keepwhitespace:
                         s.append(text)
-                    elif is_inline or self.name in OTHER_TEXTHOLDING_TAGS:
+                    elif is_inline or flags & _FLAG_TEXTHOLDING:
                         if last_char not in " \t\v\f\r\n":
                             s.append(" ")
                         else:
@@ -1564,16 +1990,17 @@ class Tag(PageElement):
                     s.append(text)
 
             # handle tags
-            elif isinstance(c, Tag):
+            elif kind == _KIND_TAG:
                 val = c.prettyprint_xhtml(indent_level, eventual_encoding, formatter, indent_chars)
+                child_is_inline = _tag_flags(c.name) & _FLAG_INLINE
                 # track if contains block tags and append newline and prepend newline if needed
-                if not c.name in NON_BREAKING_INLINE_TAGS:
+                if not child_is_inline:
                     contains_block_tags = True
                     if last_char != "\n":
                         s.append("\n")
                         last_char = "\n"
                 # if child of a structual tag is inline and follows a newline, indent it properly
-                if is_structural and c.name in NON_BREAKING_INLINE_TAGS and last_char == '\n':
+                if is_structural and child_is_inline and last_char == '\n':
                     s.append(indent_space)
                     val = val.lstrip()
                 s.append(val)
@@ -1621,10 +2048,22 @@ class Tag(PageElement):
 
     #Soup methods
 
-    def find(self, name=None, attrs=OrderedDict(), recursive=True, text=None,
+    def find(self, name=None, attrs=_NO_ATTRS, recursive=True, text=None,
              **kwargs):
         """Return only the first child of this Tag matching the given
         criteria."""
+        if (recursive and name is not None and name.__class__ is str
+            and text is None and not attrs and not kwargs):
+            # Mirror of the find_all() fast path, minus the ResultSet:
+            # the first hit of the pointer walk is the answer.
+            if self.contents:
+                stopNode = self._last_descendant().next_element
+                current = self.contents[0]
+                while current is not stopNode:
+                    if isinstance(current, Tag) and current.name == name:
+                        return current
+                    current = current.next_element
+            return None
         r = None
         l = self.find_all(name, attrs, recursive, text, 1, **kwargs)
         if l:
@@ -1632,7 +2071,7 @@ class Tag(PageElement):
         return r
     findChild = find
 
-    def find_all(self, name=None, attrs=OrderedDict(), recursive=True, text=None,
+    def find_all(self, name=None, attrs=_NO_ATTRS, recursive=True, text=None,
                  limit=None, **kwargs):
         """Extracts a list of Tag objects that match the given
         criteria.  You can specify the name of the Tag and any
@@ -1644,9 +2083,35 @@ class Tag(PageElement):
         string matches for some custom definition of 'matches'. The
         same is true of the tag name."""
 
+        if (recursive and name is not None and name.__class__ is str
+            and text is None and not attrs and not kwargs):
+            # The overwhelmingly common calls are find_all('tagname')
+            # and find('tagname'). Walk the next_element pointers in a
+            # plain loop instead of resuming the descendants generator
+            # once per element, stopping early once 'limit' matches
+            # have been collected.
+            results = ResultSet(SoupStrainer(name))
+            append = results.append
+            if self.contents:
+                stopNode = self._last_descendant().next_element
+                current = self.contents[0]
+                while current is not stopNode:
+                    if isinstance(current, Tag) and current.name == name:
+                        append(current)
+                        if limit and len(results) >= limit:
+                            break
+                    current = current.next_element
+            return results
+
         generator = self.descendants
         if not recursive:
             generator = self.children
+        elif (isinstance(name, SoupStrainer)
+              and not name.can_match_descendants):
+            # The strainer has declared that children of a
+            # non-matching tag can't match either, so entire subtrees
+            # can be skipped instead of visited element by element.
+            generator = self._pruning_descendants(name)
         return self._find_all(name, attrs, text, limit, generator, **kwargs)
     findAll = find_all       # BS3
     findChildren = find_all  # BS2
@@ -1667,10 +2132,137 @@ class Tag(PageElement):
             yield current
             current = current.next_element
 
+    def _pruning_descendants(self, strainer):
+        """Like .descendants, but skips the subtree below any Tag the
+        given SoupStrainer rejects.
+
+        Only safe for strainers whose criteria guarantee that a
+        descendant of a non-matching tag can't match, which they
+        declare by setting can_match_descendants to False. Used by
+        find_all() for batch extraction from large documents.
+        """
+        if not self.contents:
+            return
+        stopNode = self._last_descendant().next_element
+        current = self.contents[0]
+        while current is not stopNode:
+            yield current
+            if (isinstance(current, Tag) and current.contents
+                and strainer.search_tag(current) is None):
+                # Nothing below this tag can match; jump straight
+                # past its last descendant.
+                current = current._last_descendant().next_element
+            else:
+                current = current.next_element
+
     # CSS selector code
 
     _selector_combinators = ['>', '+', '~']
     _select_debug = False
+    def _simple_selector_step(self, token, _cache=_SELECTOR_STEPS):
+        """The compiled (tag_name, checker, nth_of_type) triple for one
+        non-combinator selector token, memoized by token string.
+
+        'checker' is stateless and safely shared between runs. The
+        nth-of-type pseudo-class needs per-run state, so its step
+        carries the target index instead and select() builds a fresh
+        counter each time.
+        """
+        step = _cache.get(token)
+        if step is None:
+            step = self._parse_selector_token(token)
+            if len(_cache) > 512:
+                _cache.clear()
+            _cache[token] = step
+        return step
+
+    def _parse_selector_token(self, token):
+        """Parse one simple selector token. See _simple_selector_step()."""
+        tag_name = None
+        checker = None
+
+        # One scan over the token decides which selector syntaxes can
+        # possibly apply, instead of a regex attempt plus a substring
+        # scan per syntax. Dispatch below keeps the historical
+        # precedence: attribute, then id, then class, then pseudo.
+        has_bracket = has_hash = has_dot = has_colon = False
+        for ch in token:
+            if ch == '[':
+                has_bracket = True
+            elif ch == '#':
+                has_hash = True
+            elif ch == '.':
+                has_dot = True
+            elif ch == ':':
+                has_colon = True
+
+        m = _ATTRIBSELECT_RE.match(token) if has_bracket else None
+        if m is not None:
+            # Attribute selector
+            tag_name, attribute, operator, value = m.groups()
+            checker = self._attribute_checker(operator, attribute, value)
+
+        elif has_hash:
+            # ID selector
+            tag_name, tag_id = token.split('#', 1)
+            def id_matches(tag):
+                return tag.get('id', None) == tag_id
+            checker = id_matches
+
+        elif has_dot:
+            # Class selector
+            tag_name, klass = token.split('.', 1)
+            classes = set(klass.split('.'))
+            def classes_match(candidate):
+                # Subset tests against the raw 'class' list rescan it
+                # once per selector class; keep a frozenset beside the
+                # tag, keyed on the value's identity so attribute
+                # mutation naturally invalidates it.
+                val = candidate.attrs.get('class', ())
+                cached = candidate._class_set_cache
+                if cached is None or cached[0] is not val:
+                    cached = (val, frozenset(val))
+                    candidate._class_set_cache = cached
+                return classes <= cached[1]
+            checker = classes_match
+
+        elif has_colon:
+            # Pseudo-class
+            tag_name, pseudo = token.split(':', 1)
+            if tag_name == '':
+                raise ValueError(
+                    "A pseudo-class must be prefixed with a tag name.")
+            pseudo_attributes = _PSEUDO_RE.match(pseudo)
+            if pseudo_attributes is None:
+                pseudo_type = pseudo
+                pseudo_value = None
+            else:
+                pseudo_type, pseudo_value = pseudo_attributes.groups()
+            if pseudo_type == 'nth-of-type':
+                try:
+                    pseudo_value = int(pseudo_value)
+                except:
+                    raise NotImplementedError(
+                        'Only numeric values are currently supported for the nth-of-type pseudo-class.')
+                if pseudo_value < 1:
+                    raise ValueError(
+                        'nth-of-type pseudo-class value must be at least 1.')
+                return (tag_name or None, None, pseudo_value)
+            else:
+                raise NotImplementedError(
+                    'Only the following pseudo-classes are implemented: nth-of-type.')
+
+        elif token == '*':
+            # Star selector -- matches everything
+            pass
+        elif _TAG_NAME_RE.match(token):
+            # Just a tag name.
+            tag_name = token
+        else:
+            raise ValueError(
+                'Unsupported or invalid CSS selector: "%s"' % token)
+        return (tag_name or None, checker, None)
+
     def select_one(self, selector):
         """Perform a CSS selection operation on the current element."""
         value = self.select(selector, limit=1)
@@ -1682,8 +2274,14 @@ class Tag(PageElement):
         """Perform a CSS selection operation on the current element."""
 
         # Remove whitespace directly after the grouping operator ','
-        # then split into tokens.
-        tokens = re.sub(',[\s]*',',', selector).split()
+        # then split into tokens. Selectors repeat heavily, so the
+        # token lists are memoized; they are never mutated below.
+        tokens = _SELECTOR_TOKEN_LISTS.get(selector)
+        if tokens is None:
+            tokens = _GROUP_COMMA_RE.sub(',', selector).split()
+            if len(_SELECTOR_TOKEN_LISTS) > 512:
+                _SELECTOR_TOKEN_LISTS.clear()
+            _SELECTOR_TOKEN_LISTS[selector] = tokens
         current_context = [self]
 
         if tokens[-1] in self._selector_combinators:
@@ -1694,13 +2292,26 @@ class Tag(PageElement):
             print('Running CSS selector "%s"' % selector)
 
         for index, token_group in enumerate(tokens):
+            # Matches are normally deduplicated by stamping each tag
+            # with a per-token-group generation number -- one attribute
+            # compare instead of two id() set operations per match.
+            # Combinator steps recurse into select(), which advances
+            # the shared counter and would clobber our stamps, so they
+            # fall back to the id() set.
+            gen = _SELECT_GEN[0] + 1
+            _SELECT_GEN[0] = gen
             new_context = []
-            new_context_ids = set([])
+            new_context_ids = None
 
-            # Grouping selectors, ie: p,a
-            grouped_tokens = token_group.split(',')
-            if '' in grouped_tokens:
-                raise ValueError('Invalid group selection syntax: %s' % token_group)
+            # Grouping selectors, ie: p,a -- rare enough that the
+            # split is skipped when there's no comma.
+            if ',' in token_group:
+                grouped_tokens = token_group.split(',')
+                if '' in grouped_tokens:
+                    raise ValueError(
+                        'Invalid group selection syntax: %s' % token_group)
+            else:
+                grouped_tokens = (token_group,)
 
             if tokens[index-1] in self._selector_combinators:
                 # This token was consumed by the previous combinator. Skip it.
@@ -1713,6 +2324,9 @@ class Tag(PageElement):
                     print(' Considering token "%s"' % token)
                 recursive_candidate_generator = None
                 tag_name = None
+                # Every generator below yields Tags only, except a
+                # caller-supplied one.
+                candidates_are_tags = True
 
                 # Each operation corresponds to a checker function, a rule
                 # for determining whether a candidate matches the
@@ -1720,93 +2334,27 @@ class Tag(PageElement):
                 # iterator.
                 checker = None
 
-                m = self.attribselect_re.match(token)
-                if m is not None:
-                    # Attribute selector
-                    tag_name, attribute, operator, value = m.groups()
-                    checker = self._attribute_checker(operator, attribute, value)
-
-                elif '#' in token:
-                    # ID selector
-                    tag_name, tag_id = token.split('#', 1)
-                    def id_matches(tag):
-                        return tag.get('id', None) == tag_id
-                    checker = id_matches
-
-                elif '.' in token:
-                    # Class selector
-                    tag_name, klass = token.split('.', 1)
-                    classes = set(klass.split('.'))
-                    def classes_match(candidate):
-                        return classes.issubset(candidate.get('class', []))
-                    checker = classes_match
-
-                elif ':' in token:
-                    # Pseudo-class
-                    tag_name, pseudo = token.split(':', 1)
-                    if tag_name == '':
-                        raise ValueError(
-                            "A pseudo-class must be prefixed with a tag name.")
-                    pseudo_attributes = re.match('([a-zA-Z\d-]+)\(([a-zA-Z\d]+)\)', pseudo)
-                    found = []
-                    if pseudo_attributes is None:
-                        pseudo_type = pseudo
-                        pseudo_value = None
-                    else:
-                        pseudo_type, pseudo_value = pseudo_attributes.groups()
-                    if pseudo_type == 'nth-of-type':
-                        try:
-                            pseudo_value = int(pseudo_value)
-                        except:
-                            raise NotImplementedError(
-                                'Only numeric values are currently supported for the nth-of-type pseudo-class.')
-                        if pseudo_value < 1:
-                            raise ValueError(
-                                'nth-of-type pseudo-class value must be at least 1.')
-                        class Counter(object):
-                            def __init__(self, destination):
-                                self.count = 0
-                                self.destination = destination
-
-                            def nth_child_of_type(self, tag):
-                                self.count += 1
-                                if self.count == self.destination:
-                                    return True
-                                if self.count > self.destination:
-                                    # Stop the generator that's sending us
-                                    # these things.
-                                    raise StopIteration()
-                                return False
-                        checker = Counter(pseudo_value).nth_child_of_type
-                    else:
-                        raise NotImplementedError(
-                            'Only the following pseudo-classes are implemented: nth-of-type.')
-
-                elif token == '*':
-                    # Star selector -- matches everything
-                    pass
-                elif token == '>':
+                if token == '>':
                     # Run the next token as a CSS selector against the
                     # direct children of each tag in the current context.
-                    recursive_candidate_generator = lambda tag: tag.children
+                    recursive_candidate_generator = _combinator_children
                 elif token == '~':
                     # Run the next token as a CSS selector against the
                     # siblings of each tag in the current context.
-                    recursive_candidate_generator = lambda tag: tag.next_siblings
+                    recursive_candidate_generator = _combinator_next_siblings
                 elif token == '+':
                     # For each tag in the current context, run the next
                     # token as a CSS selector against the tag's next
                     # sibling that's a tag.
-                    def next_tag_sibling(tag):
-                        yield tag.find_next_sibling(True)
-                    recursive_candidate_generator = next_tag_sibling
-
-                elif self.tag_name_re.match(token):
-                    # Just a tag name.
-                    tag_name = token
+                    recursive_candidate_generator = _combinator_next_tag_sibling
                 else:
-                    raise ValueError(
-                        'Unsupported or invalid CSS selector: "%s"' % token)
+                    tag_name, checker, nth_of_type = \
+                        self._simple_selector_step(token)
+                    if nth_of_type is not None:
+                        # Stateful, so a fresh counter per run; the
+                        # class itself lives at module scope.
+                        checker = _NthOfTypeCounter(
+                            nth_of_type).nth_child_of_type
                 if recursive_candidate_generator:
                     # This happens when the selector looks like  "> foo".
                     #
@@ -1818,17 +2366,49 @@ class Tag(PageElement):
                     # one that yields a tag's direct children (">"), and
                     # the selector is "foo".
                     next_token = tokens[index+1]
-                    def recursive_select(tag):
-                        if self._select_debug:
-                            print('    Calling select("%s") recursively on %s %s' % (next_token, tag.name, tag.attrs))
-                            print('-' * 40)
-                        for i in tag.select(next_token, recursive_candidate_generator):
+                    inline_step = None
+                    if (not self._select_debug
+                        and ',' not in next_token
+                        and next_token not in self._selector_combinators):
+                        try:
+                            inline_step = self._simple_selector_step(
+                                next_token)
+                        except Exception:
+                            # Let the recursive path report the error
+                            # the way it always has.
+                            inline_step = None
+                    if inline_step is not None and inline_step[2] is None:
+                        # The combinator's argument is a single simple,
+                        # stateless step -- which is almost every real
+                        # use ("div > p", "p + p"). Filter the
+                        # combinator's candidates right here instead of
+                        # re-entering the selector parser through
+                        # tag.select() for every context tag.
+                        def combinator_select(
+                                tag, _gen=recursive_candidate_generator,
+                                _name=inline_step[0],
+                                _checker=inline_step[1]):
+                            for i in _gen(tag):
+                                if not isinstance(i, Tag):
+                                    continue
+                                if _name and i.name != _name:
+                                    continue
+                                if _checker is not None and not _checker(i):
+                                    continue
+                                yield i
+                        _use_candidate_generator = combinator_select
+                    else:
+                        def recursive_select(tag):
+                            if self._select_debug:
+                                print('    Calling select("%s") recursively on %s %s' % (next_token, tag.name, tag.attrs))
+                                print('-' * 40)
+                            for i in tag.select(next_token, recursive_candidate_generator):
+                                if self._select_debug:
+                                    print('(Recursive select picked up candidate %s %s)' % (i.name, i.attrs))
+                                yield i
                             if self._select_debug:
-                                print('(Recursive select picked up candidate %s %s)' % (i.name, i.attrs))
-                            yield i
-                        if self._select_debug:
-                            print('-' * 40)
-                    _use_candidate_generator = recursive_select
+                                print('-' * 40)
+                        _use_candidate_generator = recursive_select
                 elif _candidate_generator is None:
                     # By default, a tag's candidates are all of its
                     # children. If tag_name is defined, only yield tags
@@ -1852,9 +2432,12 @@ class Tag(PageElement):
                                 yield child
                         _use_candidate_generator = default_candidate_generator
                     else:
-                        _use_candidate_generator = lambda tag: tag.descendants
+                        _use_candidate_generator = (
+                            lambda tag, _name=tag_name or None:
+                                _tag_descendants(tag, _name))
                 else:
                     _use_candidate_generator = _candidate_generator
+                    candidates_are_tags = False
 
                 count = 0
                 for tag in current_context:
@@ -1862,25 +2445,33 @@ class Tag(PageElement):
                         print("    Running candidate generator on %s %s" % (
                             tag.name, repr(tag.attrs)))
                     for candidate in _use_candidate_generator(tag):
-                        if not isinstance(candidate, Tag):
+                        if (not candidates_are_tags
+                            and not isinstance(candidate, Tag)):
                             continue
                         if tag_name and candidate.name != tag_name:
                             continue
                         if checker is not None:
-                            try:
-                                result = checker(candidate)
-                            except StopIteration:
+                            result = checker(candidate)
+                            if result is _STOP:
                                 # The checker has decided we should no longer
                                 # run the generator.
                                 break
                         if checker is None or result:
                             if self._select_debug:
                                 print("     SUCCESS %s %s" % (candidate.name, repr(candidate.attrs)))
-                            if id(candidate) not in new_context_ids:
-                                # If a tag matches a selector more than once,
-                                # don't include it in the context more than once.
+                            # If a tag matches a selector more than once,
+                            # don't include it in the context more than once.
+                            if recursive_candidate_generator is not None:
+                                if new_context_ids is None:
+                                    new_context_ids = set()
+                                if id(candidate) not in new_context_ids:
+                                    new_context.append(candidate)
+                                    new_context_ids.add(id(candidate))
+                                    if limit and len(new_context) >= limit:
+                                        break
+                            elif candidate._select_gen != gen:
+                                candidate._select_gen = gen
                                 new_context.append(candidate)
-                                new_context_ids.add(id(candidate))
                                 if limit and len(new_context) >= limit:
                                     break
                         elif self._select_debug:
@@ -1915,7 +2506,7 @@ class SoupStrainer(object):
     """Encapsulates a number of ways of matching a markup element (tag or
     text)."""
 
-    def __init__(self, name=None, attrs=OrderedDict(), text=None, **kwargs):
+    def __init__(self, name=None, attrs=_NO_ATTRS, text=None, **kwargs):
         self.name = self._normalize_search_value(name)
         if not isinstance(attrs, dict):
             # Treat a non-dict value for attrs as a search for the 'class'
@@ -1935,13 +2526,32 @@ class SoupStrainer(object):
                 attrs.update(kwargs)
             else:
                 attrs = kwargs
-        normalized_attrs = OrderedDict()
-        for key, value in list(attrs.items()):
-            normalized_attrs[key] = self._normalize_search_value(value)
-
-        self.attrs = normalized_attrs
+        if attrs:
+            normalized_attrs = {}
+            for key, value in attrs.items():
+                normalized_attrs[key] = self._normalize_search_value(value)
+            self.attrs = normalized_attrs
+        else:
+            # .attrs is public and historically per-instance, so each
+            # strainer gets its own dict; aliasing the module-level
+            # default would let one caller's mutation leak into every
+            # later find_*() call.
+            self.attrs = {}
         self.text = self._normalize_search_value(text)
 
+        # Classify each criterion once; see _match_kind().
+        self._name_kind = _match_kind(self.name)
+        self._text_kind = _match_kind(self.text)
+        self._attr_checks = tuple(
+            (attr, value, _match_kind(value))
+            for attr, value in self.attrs.items())
+
+        # Callers doing batch extraction can set this to False to
+        # promise that no descendant of a non-matching tag can match,
+        # letting find_all() prune whole subtrees instead of walking
+        # every element. See Tag._pruning_descendants.
+        self.can_match_descendants = True
+
     def _normalize_search_value(self, value):
         # Leave it alone if it's a Unicode string, a callable, a
         # regular expression, a boolean, or None.
@@ -1976,7 +2586,7 @@ class SoupStrainer(object):
         else:
             return "%s|%s" % (self.name, self.attrs)
 
-    def search_tag(self, markup_name=None, markup_attrs=OrderedDict()):
+    def search_tag(self, markup_name=None, markup_attrs=_NO_ATTRS):
         found = None
         markup = None
         if isinstance(markup_name, Tag):
@@ -1988,31 +2598,38 @@ class SoupStrainer(object):
 
         if ((not self.name)
             or call_function_with_tag_data
-            or (markup and self._matches(markup, self.name))
-            or (not markup and self._matches(markup_name, self.name))):
+            or (markup and self._matches(
+                    markup, self.name, self._name_kind))
+            or (not markup and self._matches(
+                    markup_name, self.name, self._name_kind))):
             if call_function_with_tag_data:
                 match = self.name(markup_name, markup_attrs)
             else:
                 match = True
-                markup_attr_map = None
-                for attr, match_against in list(self.attrs.items()):
-                    if not markup_attr_map:
-                        if hasattr(markup_attrs, 'get'):
-                            markup_attr_map = markup_attrs
-                        else:
-                            markup_attr_map = OrderedDict()
-                            for k, v in markup_attrs:
-                                markup_attr_map[k] = v
-                    attr_value = markup_attr_map.get(attr)
-                    if not self._matches(attr_value, match_against):
-                        match = False
-                        break
+                if self.attrs:
+                    # Resolve where to read attribute values from once,
+                    # not per criterion: a Tag's attrs dict directly,
+                    # any other mapping as-is, or a pair sequence
+                    # copied into a dict.
+                    if markup is not None:
+                        markup_attr_map = markup.attrs
+                    elif hasattr(markup_attrs, 'get'):
+                        markup_attr_map = markup_attrs
+                    else:
+                        markup_attr_map = dict(markup_attrs)
+                    get_attr = markup_attr_map.get
+                    for attr, match_against, kind in self._attr_checks:
+                        if not self._matches(
+                                get_attr(attr), match_against, kind):
+                            match = False
+                            break
             if match:
                 if markup:
                     found = markup
                 else:
                     found = markup_name
-        if found and self.text and not self._matches(found.string, self.text):
+        if found and self.text and not self._matches(
+                found.string, self.text, self._text_kind):
             found = None
         return found
     searchTag = search_tag
@@ -2020,56 +2637,56 @@ class SoupStrainer(object):
     def search(self, markup):
         # print 'looking for %s in %s' % (self, markup)
         found = None
+        # Tags dominate the markup fed to a strainer, so test for them
+        # first rather than starting with the hasattr() probe for the
+        # rare list-of-items case. Don't bother with Tags if we're
+        # searching for text.
+        if isinstance(markup, Tag):
+            if not self.text or self.name or self.attrs:
+                found = self.search_tag(markup)
+        # If it's text, make sure the text matches. NavigableString
+        # is a str subclass, so one test covers both.
+        elif isinstance(markup, str):
+            if not self.name and not self.attrs and self._matches(
+                    markup, self.text, self._text_kind):
+                found = markup
         # If given a list of items, scan it for a text element that
         # matches.
-        if hasattr(markup, '__iter__') and not isinstance(markup, (Tag, str)):
+        elif hasattr(markup, '__iter__'):
             for element in markup:
                 if isinstance(element, NavigableString) \
                        and self.search(element):
                     found = element
                     break
-        # If it's a Tag, make sure its name or attributes match.
-        # Don't bother with Tags if we're searching for text.
-        elif isinstance(markup, Tag):
-            if not self.text or self.name or self.attrs:
-                found = self.search_tag(markup)
-        # If it's text, make sure the text matches.
-        elif isinstance(markup, NavigableString) or \
-                 isinstance(markup, str):
-            if not self.name and not self.attrs and self._matches(markup, self.text):
-                found = markup
         else:
             raise Exception(
                 "I don't know how to match against a %s" % markup.__class__)
         return found
 
-    def _matches(self, markup, match_against):
+    def _matches(self, markup, match_against, kind=None):
         # print u"Matching %s against %s" % (markup, match_against)
-        result = False
+        if kind is None:
+            kind = _match_kind(match_against)
         if isinstance(markup, list) or isinstance(markup, tuple):
             # This should only happen when searching a multi-valued attribute
             # like 'class'.
-            if (isinstance(match_against, str)
-                and ' ' in match_against):
+            if kind == _MK_STR and ' ' in match_against:
                 # A bit of a special case. If they try to match "foo
                 # bar" on a multivalue attribute's value, only accept
                 # the literal value "foo bar"
                 #
-                # XXX This is going to be pretty slow because we keep
-                # splitting match_against. But it shouldn't come up
-                # too often.
-                return (whitespace_re.split(match_against) == markup)
+                return (list(_whitespace_split(match_against)) == markup)
             else:
                 for item in markup:
-                    if self._matches(item, match_against):
+                    if self._matches(item, match_against, kind):
                         return True
                 return False
 
-        if match_against is True:
+        if kind == _MK_TRUE:
             # True matches any non-None value.
             return markup is not None
 
-        if isinstance(match_against, Callable):
+        if kind == _MK_CALLABLE:
             return match_against(markup)
 
         # Custom callables take the tag as an argument, but all
@@ -2084,15 +2701,15 @@ class SoupStrainer(object):
             # None matches None, False, an empty string, an empty list, and so on.
             return not match_against
 
-        if isinstance(match_against, str):
+        if kind == _MK_STR:
             # Exact string match
             return markup == match_against
 
-        if hasattr(match_against, 'match'):
+        if kind == _MK_REGEX:
             # Regexp match
             return match_against.search(markup)
 
-        if hasattr(match_against, '__iter__'):
+        if kind == _MK_ITER:
             # The markup must be an exact match against something
             # in the iterable.
             return markup in match_against